@@ -22,24 +22,96 @@ Script ini akan mencoba mendeteksi path tersebut secara otomatis.
 from __future__ import annotations
 
 import os
+
+# Batasi OpenMP internal Tesseract ke 1 thread SEBELUM pytesseract diimpor.
+# Multi-threading OpenMP Tesseract tidak efisien; beberapa proses tesseract
+# single-thread yang berjalan paralel (lihat main) jauh lebih hemat core.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+import functools
+import re
 import sys
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client
 from typing import Tuple
 
+from ocr_daemon import DAEMON_ADDRESS, DAEMON_FAMILY
+
 import cv2
 import numpy as np
 import pytesseract
 from pytesseract import Output
 
+# tesserocr (opsional): API C++ Tesseract yang bisa dipakai ulang tanpa
+# spawn subprocess + load ulang model LSTM di tiap pemanggilan.
+# Jika tidak terpasang, semua fungsi otomatis fallback ke pytesseract.
+try:
+	from PIL import Image
+	from tesserocr import OEM, PSM, RIL, PyTessBaseAPI, iterate_level
+
+	TESSEROCR_AVAILABLE = True
+except ImportError:
+	TESSEROCR_AVAILABLE = False
+
+# cv2.ximgproc (opsional, paket opencv-contrib-python): menyediakan
+# guided filter O(N) untuk smoothing edge-preserving di enhancement.
+_HAS_XIMGPROC = hasattr(cv2, "ximgproc")
+
+# Numba (opsional): JIT untuk koreksi pola angka pada output OCR panjang.
+# Tanpa numba, fix_number_patterns memakai jalur regex biasa.
+try:
+	import numba
+except ImportError:
+	numba = None
+
+# PyTurboJPEG (opsional): decode JPEG dengan SIMD libjpeg-turbo,
+# jauh lebih cepat dari decoder bawaan cv2.imread untuk scan besar.
+# Konstruktor bisa gagal (library native tidak ada) -> fallback ke cv2.
+try:
+	from turbojpeg import TurboJPEG
+
+	_TURBOJPEG = TurboJPEG()
+except Exception:
+	_TURBOJPEG = None
+
+
+# File cache path tesseract hasil deteksi, dibaca duluan di run berikutnya
+_TESSERACT_PATH_CACHE = os.path.join(os.path.expanduser("~"), ".ocr_tesseract_path")
 
+
+def _save_tesseract_path(path: str) -> None:
+	"""Simpan path tesseract ke dotfile (best-effort, boleh gagal diam)."""
+	try:
+		with open(_TESSERACT_PATH_CACHE, "w", encoding="utf-8") as f:
+			f.write(path)
+	except OSError:
+		pass
+
+
+@functools.lru_cache(maxsize=1)
 def ensure_tesseract_cmd() -> str | None:
 	"""
 	Deteksi tesseract.exe dan set untuk pytesseract bila perlu.
-	Urutan: coba dari PATH (shutil.which), lalu lokasi umum Windows.
+	Urutan: cache dotfile dari run sebelumnya, PATH (shutil.which),
+	lalu lokasi umum Windows. Hasil dimemoize (lru_cache) dan ditulis
+	balik ke ~/.ocr_tesseract_path agar run berikutnya tidak perlu
+	memindai PATH/filesystem lagi.
 	"""
+	# 0) Cache dari run sebelumnya?
+	try:
+		with open(_TESSERACT_PATH_CACHE, "r", encoding="utf-8") as f:
+			cached = f.read().strip()
+	except OSError:
+		cached = ""
+	if cached and os.path.isfile(cached):
+		pytesseract.pytesseract.tesseract_cmd = cached
+		return cached
+
 	# 1) Sudah ada di PATH?
 	found = shutil.which("tesseract")
 	if found:
+		_save_tesseract_path(found)
 		return found
 
 	# 2) Lokasi umum Windows
@@ -51,10 +123,26 @@ def ensure_tesseract_cmd() -> str | None:
 		for p in candidates:
 			if os.path.isfile(p):
 				pytesseract.pytesseract.tesseract_cmd = p
+				_save_tesseract_path(p)
 				return p
 	return None
 
 
+def load_image(img_path: str) -> np.ndarray | None:
+	"""
+	Baca gambar dari disk sebagai BGR (format yang sama dengan cv2.imread).
+	JPEG didecode lewat libjpeg-turbo (AVX2/NEON) bila tersedia;
+	format lain (atau jika turbojpeg tidak ada) memakai cv2.imread.
+	"""
+	if _TURBOJPEG is not None and img_path.lower().endswith((".jpg", ".jpeg")):
+		try:
+			with open(img_path, "rb") as f:
+				return _TURBOJPEG.decode(f.read())
+		except Exception:
+			pass  # file JPEG korup/aneh -> biarkan cv2 yang mencoba
+	return cv2.imread(img_path)
+
+
 def preprocess_image(img_bgr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
 	"""
 	Preprocessing gambar untuk meningkatkan hasil OCR.
@@ -69,26 +157,33 @@ def preprocess_image(img_bgr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
 	- processed: citra hasil akhir (biner) untuk OCR dan deteksi
 	- gray: citra grayscale (untuk ditampilkan jika perlu)
 	"""
-	# 1) Grayscale
+	# 1) Grayscale (input 1-kanal dipakai langsung; tidak pernah dimutasi
+	# di bawah, jadi tidak perlu salinan penuh)
 	if len(img_bgr.shape) == 3:
 		gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
 	else:
-		gray = img_bgr.copy()
+		gray = img_bgr
+
+	# Satu buffer scratch dipakai ulang untuk seluruh rantai (blur, threshold,
+	# morfologi mendukung operasi in-place), menghindari 4 alokasi citra penuh
+	processed = np.empty_like(gray)
 
 	# 2) Kurangi noise (opsional tapi membantu Otsu threshold)
-	gray_blur = cv2.GaussianBlur(gray, (5, 5), 0)
+	cv2.GaussianBlur(gray, (5, 5), 0, dst=processed)
 
 	# 3) Thresholding Otsu -> menghasilkan citra biner
-	_thr, thresh = cv2.threshold(
-		gray_blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
+	cv2.threshold(
+		processed, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=processed
 	)
 
 	# 4) Operasi morfologi: open (erode -> dilate) untuk hapus noise kecil
-	kernel = np.ones((3, 3), np.uint8)
-	opened = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=1)
+	# getStructuringElement(MORPH_RECT) memakai jalur morfologi separable
+	# OpenCV (pass horizontal + vertikal, SIMD), bukan kernel generik
+	kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+	cv2.morphologyEx(processed, cv2.MORPH_OPEN, kernel, dst=processed, iterations=1)
 
 	# 5) Close (dilate -> erode) untuk menutup celah kecil pada huruf/katakata
-	processed = cv2.morphologyEx(opened, cv2.MORPH_CLOSE, kernel, iterations=1)
+	cv2.morphologyEx(processed, cv2.MORPH_CLOSE, kernel, dst=processed, iterations=1)
 
 	return processed, gray
 
@@ -96,39 +191,115 @@ def preprocess_image(img_bgr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
 def upscale_image(img: np.ndarray, scale: float = 2.0) -> np.ndarray:
 	"""
 	Upscale gambar untuk meningkatkan resolusi teks kecil.
-	Menggunakan interpolasi CUBIC untuk hasil terbaik.
+	Menggunakan interpolasi LANCZOS4: sedikit lebih mahal dari CUBIC
+	tapi terasa lebih tajam untuk teks.
 	"""
 	if scale <= 1.0:
 		return img
-	
+
 	height, width = img.shape[:2]
 	new_width = int(width * scale)
 	new_height = int(height * scale)
-	
-	upscaled = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
+
+	upscaled = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_LANCZOS4)
 	return upscaled
 
 
 def enhance_document_image(img_gray: np.ndarray) -> np.ndarray:
 	"""
 	Enhancement khusus untuk dokumen dengan teks kecil dan noise.
-	
+
 	Teknik:
-	- Unsharp masking untuk sharpening
-	- Contrast enhancement
-	- Adaptive bilateral filtering
+	- Unsharp masking untuk sharpening (aritmetika float16)
+	- Contrast enhancement (min-max normalize)
+	- Smoothing edge-preserving (guided filter) untuk meredam noise
+	  hasil sharpening tanpa mengaburkan tepi huruf
 	"""
-	# 1) Unsharp masking untuk meningkatkan ketajaman
-	gaussian = cv2.GaussianBlur(img_gray, (0, 0), 2.0)
-	unsharp = cv2.addWeighted(img_gray, 1.5, gaussian, -0.5, 0)
-	
-	# 2) Normalize contrast
-	unsharp = cv2.normalize(unsharp, None, 0, 255, cv2.NORM_MINMAX)
-	
-	# 3) Bilateral filter untuk smooth sambil preserve edges
-	enhanced = cv2.bilateralFilter(unsharp, 9, 75, 75)
-	
-	return enhanced
+	# 1) Unsharp masking untuk meningkatkan ketajaman.
+	# Aritmetika dalam float16: setengah footprint intermediate float32,
+	# lane SIMD dua kali lebih padat untuk pipeline yang memory-bound ini.
+	blur16 = cv2.GaussianBlur(img_gray, (0, 0), 2.0).astype(np.float16)
+	unsharp = img_gray.astype(np.float16) * np.float16(1.5) - blur16 * np.float16(0.5)
+
+	# 2) Normalize contrast (min-max) langsung di float16
+	lo = unsharp.min()
+	hi = unsharp.max()
+	if hi > lo:
+		unsharp = (unsharp - lo) * (np.float16(255) / (hi - lo))
+	enhanced = np.clip(unsharp, 0, 255).astype(np.uint8)
+
+	# 3) Smoothing peredam noise hasil sharpening. Guided filter
+	# edge-preserving dengan biaya O(N) (box filter via integral image),
+	# setara bilateral d=9 yang dulu dipakai tapi jauh lebih murah;
+	# tanpa opencv-contrib, fallback ke blur 3x3 separable.
+	if _HAS_XIMGPROC:
+		return cv2.ximgproc.guidedFilter(guide=enhanced, src=enhanced, radius=4, eps=2500)
+	return cv2.GaussianBlur(enhanced, (3, 3), 0)
+
+
+def crop_to_ink(img_bin: np.ndarray, margin: int = 10) -> Tuple[np.ndarray, int, int]:
+	"""
+	Potong citra biner ke bounding rect piksel "tinta" (non-putih), agar
+	Tesseract tidak menghabiskan waktu memindai margin kosong.
+
+	Return: (crop, x_offset, y_offset). Offset dipakai untuk menggeser
+	kembali koordinat bounding box ke ruang citra asli.
+	Jika tidak ada tinta sama sekali, kembalikan citra asli dengan offset 0.
+	"""
+	inv = 255 - img_bin
+	nz = cv2.findNonZero(inv)
+	if nz is None:
+		return img_bin, 0, 0
+
+	x, y, w, h = cv2.boundingRect(nz)
+	# Sisakan margin kecil supaya stroke di tepi tidak terpotong
+	x0 = max(0, x - margin)
+	y0 = max(0, y - margin)
+	x1 = min(img_bin.shape[1], x + w + margin)
+	y1 = min(img_bin.shape[0], y + h + margin)
+	return img_bin[y0:y1, x0:x1], x0, y0
+
+
+def sauvola_threshold(gray: np.ndarray, win: int = 25, k: float = 0.2) -> np.ndarray:
+	"""
+	Binerisasi adaptif Sauvola untuk dokumen.
+
+	Statistik lokal (mean & std per jendela win x win) dihitung lewat
+	integral image, jadi biayanya O(N) berapapun ukuran jendela:
+	jumlah tiap jendela = 4 pengurangan sudut, divektorisasi NumPy.
+
+	Return: citra biner uint8 (teks gelap di latar putih, seperti Otsu).
+	"""
+	g = gray.astype(np.float32)
+	h, w = gray.shape[:2]
+	pad = win // 2
+
+	integral = cv2.integral(g)          # (h+1, w+1)
+	integral_sq = cv2.integral(g * g)
+
+	# Batas jendela per piksel, diklip ke tepi gambar
+	ys = np.arange(h)
+	xs = np.arange(w)
+	y1 = np.clip(ys - pad, 0, h)
+	y2 = np.clip(ys + pad + 1, 0, h)
+	x1 = np.clip(xs - pad, 0, w)
+	x2 = np.clip(xs + pad + 1, 0, w)
+
+	area = (y2 - y1)[:, None] * (x2 - x1)[None, :]
+	s = integral[y2][:, x2] - integral[y2][:, x1] - integral[y1][:, x2] + integral[y1][:, x1]
+	s2 = (
+		integral_sq[y2][:, x2]
+		- integral_sq[y2][:, x1]
+		- integral_sq[y1][:, x2]
+		+ integral_sq[y1][:, x1]
+	)
+
+	mean = s / area
+	std = np.sqrt(np.clip(s2 / area - mean * mean, 0, None))
+
+	# Formula Sauvola: ambang lokal turun di daerah ber-kontras rendah
+	thresh = mean * (1.0 + k * (std / 128.0 - 1.0))
+	return (g > thresh).astype(np.uint8) * 255
 
 
 def perform_ocr(img_bin: np.ndarray, lang: str = "eng") -> str:
@@ -143,34 +314,158 @@ def perform_ocr(img_bin: np.ndarray, lang: str = "eng") -> str:
 	return text.replace("\x0c", "").strip()
 
 
-def perform_ocr_optimized(img: np.ndarray, lang: str = "eng+ind") -> str:
+# Pool kecil untuk cv2.imwrite: encode JPEG berjalan di background
+# (cv2 melepas GIL) dan overlap dengan pemanggilan Tesseract berikutnya
+_IO_POOL = ThreadPoolExecutor(max_workers=2)
+
+
+def _report_imwrite_failure(path: str, future) -> None:
+	"""Callback future imwrite: laporkan kegagalan yang terjadi di background."""
+	try:
+		ok = future.result()
+	except Exception as e:
+		print(f"[!] Gagal menyimpan gambar {path}: {e}")
+		return
+	if not ok:
+		print(f"[!] Gagal menyimpan gambar {path} (cv2.imwrite mengembalikan False)")
+
+
+def save_image_async(path: str, img: np.ndarray, quality: int | None = None) -> None:
+	"""
+	Tulis gambar di worker thread; quality opsional untuk JPEG debug.
+	Kegagalan tulis (folder tidak bisa ditulis, disk penuh) dilaporkan
+	lewat callback saat encode selesai, bukan dibuang diam-diam.
+	"""
+	if quality is not None:
+		future = _IO_POOL.submit(cv2.imwrite, path, img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+	else:
+		future = _IO_POOL.submit(cv2.imwrite, path, img)
+	future.add_done_callback(functools.partial(_report_imwrite_failure, path))
+
+
+# Sekali gagal terhubung ke daemon, jangan coba lagi di run yang sama
+_daemon_unavailable = False
+
+
+def ocr_via_daemon(img: np.ndarray, psm: int, lang: str) -> str | None:
+	"""
+	Coba OCR lewat daemon ocr_daemon.py yang modelnya sudah hangat.
+	Return teks hasil OCR, atau None jika daemon tidak berjalan atau
+	OCR di sisi daemon gagal (daemon mengirim None sebagai sinyal gagal,
+	caller harus fallback ke OCR in-process).
+	"""
+	global _daemon_unavailable
+	if _daemon_unavailable:
+		return None
+	try:
+		with Client(DAEMON_ADDRESS, DAEMON_FAMILY) as conn:
+			conn.send((img, psm, lang))
+			return conn.recv()
+	except (ConnectionRefusedError, FileNotFoundError, EOFError, OSError):
+		_daemon_unavailable = True
+		return None
+
+
+def perform_ocr_optimized(img: np.ndarray, lang: str = "eng+ind", api=None) -> str:
 	"""
 	OCR dengan multiple PSM modes dan pilih hasil terbaik.
 	Cocok untuk dokumen dengan layout kompleks.
+
+	- api: instance tesserocr.PyTessBaseAPI yang sudah terbuka (opsional).
+	  Jika diberikan, model Tesseract hanya dimuat sekali untuk semua mode
+	  (tanpa spawn subprocess per pemanggilan seperti pytesseract).
+
+	Mode dicoba berurutan mulai dari yang paling sering menang (PSM 6);
+	begitu sebuah hasil jelas lebih panjang dari best sejauh ini, mode
+	sisanya dilewati (streaming max + early exit).
 	"""
-	# PSM modes untuk dicoba
-	psm_configs = [
-		("--oem 3 --psm 3", "Fully automatic"),  # Best untuk dokumen lengkap
-		("--oem 3 --psm 6", "Single block"),      # Best untuk paragraf
-		("--oem 3 --psm 4", "Single column"),     # Best untuk kolom teks
+	# PSM urut berdasarkan win-rate: 6 (single block) biasanya sudah
+	# menghasilkan teks lengkap; 3 dan 4 hanya cadangan
+	psm_modes = [
+		(6, "Single block"),      # Best untuk paragraf
+		(3, "Fully automatic"),   # Best untuk dokumen lengkap
+		(4, "Single column"),     # Best untuk kolom teks
 	]
-	
-	results = []
-	for config, desc in psm_configs:
+
+	best = ""
+	for psm, desc in psm_modes:
 		try:
-			text = pytesseract.image_to_string(img, lang=lang, config=config)
+			if api is not None:
+				# Jalur cepat: pakai ulang API yang sama untuk semua mode
+				api.SetPageSegMode(psm)
+				api.SetImage(Image.fromarray(img))
+				text = api.GetUTF8Text()
+			else:
+				# Daemon hangat dulu (tanpa load model); fallback subprocess
+				text = ocr_via_daemon(img, psm, lang)
+				if text is None:
+					text = pytesseract.image_to_string(
+						img, lang=lang, config=f"--oem 3 --psm {psm}"
+					)
 			text = text.replace("\x0c", "").strip()
-			if text:
-				results.append((text, len(text)))
 		except Exception:
 			continue
-	
-	# Pilih hasil terpanjang (biasanya paling lengkap)
-	if results:
-		results.sort(key=lambda x: x[1], reverse=True)
-		return results[0][0]
-	
-	return ""
+
+		# Early exit: hasil ini jauh melampaui best -> tidak perlu mode lain
+		if len(text) > int(0.9 * len(best)) + 100:
+			return text
+		if len(text) > len(best):
+			best = text
+
+	return best
+
+
+# Dictionary perbaikan OCR umum (case-sensitive), dibangun sekali saat
+# modul dimuat. Entri duplikat dan pemetaan no-op sudah dibuang.
+_OCR_CORRECTIONS = {
+	# Angka sering salah dibaca
+	'O': '0',  # Huruf O jadi angka 0 dalam konteks angka
+	'l': '1',  # Huruf l kecil jadi 1 dalam konteks angka
+	'I': '1',  # Huruf I besar jadi 1 dalam konteks angka
+	'S': '5',  # Huruf S jadi 5 dalam konteks angka (terbatas)
+
+	# Kata-kata umum yang sering salah
+	'Unluk': 'Untuk',
+	'unluk': 'untuk',
+	'dan]': 'dari',
+	'dani': 'dari',
+	'dati': 'dari',
+	'tepal': 'tepat',
+	'saal': 'saat',
+	'Kelab': 'Keleb',
+	'Kelabihan': 'Kelebihan',
+	'yang,': 'yang',
+	'vang': 'yang',
+	'protocol': 'protokol',
+	'lebih.': 'lebih',
+	'Iinggi': 'tinggi',
+	'Iain': 'lain',
+	'handshake.': 'handshake',
+	'OSIL': 'OSI',
+	'Iayer': 'layer',
+	'hos!': 'host',
+	'hos': 'host',
+	'tiap-': 'tiap',
+	'tepall': 'tepat',
+	'CSM': 'CSMA',
+	'protocol]': 'protokol',
+	'mencegah-': 'mencegah',
+	'PC-': 'PC',
+	'Iain-': 'lain',
+	'frame.': 'frame',
+	'saat-': 'saat',
+	'proses-': 'proses',
+	'pengiriman-': 'pengiriman',
+	'dari-': 'dari',
+}
+
+# Satu pattern alternation untuk semua kunci sekaligus: scan C-level sekali
+# atas seluruh teks, bukan O(baris x pola) str.replace di level Python.
+# Kunci diurutkan dari yang terpanjang agar kunci pendek yang merupakan
+# prefix kunci lain (mis. 'hos' vs 'hos!') tidak menang duluan.
+_OCR_CORRECTION_PATTERN = re.compile(
+	"|".join(re.escape(k) for k in sorted(_OCR_CORRECTIONS, key=len, reverse=True))
+)
 
 
 def correct_common_ocr_errors(text: str) -> str:
@@ -179,90 +474,59 @@ def correct_common_ocr_errors(text: str) -> str:
 	"""
 	if not text:
 		return text
-	
-	# Dictionary perbaikan umum (case-sensitive)
-	corrections = {
-		# Angka sering salah dibaca
-		'O': '0',  # Huruf O jadi angka 0 dalam konteks angka
-		'l': '1',  # Huruf l kecil jadi 1 dalam konteks angka
-		'I': '1',  # Huruf I besar jadi 1 dalam konteks angka
-		'S': '5',  # Huruf S jadi 5 dalam konteks angka (terbatas)
-		
-		# Kata-kata umum yang sering salah
-		'Unluk': 'Untuk',
-		'unluk': 'untuk',
-		'Unluk': 'Untuk',
-		'dan]': 'dari',
-		'dani': 'dari',
-		'dati': 'dari',
-		'tepal': 'tepat',
-		'saal': 'saat',
-		'Kelab': 'Keleb',
-		'Kelebihan': 'Kelebihan',
-		'Kelabihan': 'Kelebihan',
-		'yang,': 'yang',
-		'vang': 'yang',
-		'protocol': 'protokol',
-		'lebih.': 'lebih',
-		'Iinggi': 'tinggi',
-		'Iain': 'lain',
-		'handshake.': 'handshake',
-		'OSIL': 'OSI',
-		'Iayer': 'layer',
-		'hos!': 'host',
-		'hos': 'host',
-		'tiap-': 'tiap',
-		'tepall': 'tepat',
-		'CSM': 'CSMA',
-		'CSMA/CD': 'CSMA/CD',
-		'protocol]': 'protokol',
-		'mencegah-': 'mencegah',
-		'PC-': 'PC',
-		'yang,': 'yang',
-		'Iain-': 'lain',
-		'frame.': 'frame',
-		'saat-': 'saat',
-		'proses-': 'proses',
-		'dan]': 'dari',
-		'pengiriman-': 'pengiriman',
-		'dari-': 'dari',
-	}
-	
-	lines = text.split('\n')
-	corrected_lines = []
-	
-	for line in lines:
-		corrected = line
-		for wrong, right in corrections.items():
-			corrected = corrected.replace(wrong, right)
-		
-		# Perbaiki spacing yang aneh
-		corrected = ' '.join(corrected.split())
-		corrected_lines.append(corrected)
-	
-	return '\n'.join(corrected_lines)
+
+	text = _OCR_CORRECTION_PATTERN.sub(lambda m: _OCR_CORRECTIONS[m.group(0)], text)
+
+	# Perbaiki spacing yang aneh
+	return '\n'.join(' '.join(line.split()) for line in text.split('\n'))
+
+
+if numba is not None:
+	@numba.njit(cache=True)
+	def _fix_digit_confusions(buf: np.ndarray, out: np.ndarray) -> None:
+		"""
+		Ganti 'O'/'o' dengan '0' hanya di dalam deretan angka (mis. IP
+		address "192.168.O.1"). DFA 2-state di atas byte UTF-8: byte
+		multibyte selalu >= 128 sehingga tidak pernah salah deteksi.
+		"""
+		in_number = False
+		for i in range(buf.size):
+			c = buf[i]
+			if 48 <= c <= 57:  # digit
+				in_number = True
+			elif c == 46:  # '.' tidak mengubah state (192.O.x.x)
+				pass
+			elif in_number and (c == 79 or c == 111):  # 'O' / 'o'
+				c = 48
+			else:
+				in_number = False
+			out[i] = c
 
 
 def fix_number_patterns(text: str) -> str:
 	"""
 	Perbaiki pola angka yang sering salah (IP address, nomor soal, dll).
 	"""
-	import re
-	
-	# Perbaiki IP address: ganti huruf O dengan 0
-	# Pattern: xxx.xxx.xxx.xxx atau xxx.xxx.xxx.x
-	ip_pattern = r'\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b'
-	
-	def fix_ip(match):
-		ip = match.group(0)
-		# Ganti O dengan 0 dalam IP
-		return ip.replace('O', '0').replace('o', '0')
-	
-	text = re.sub(ip_pattern, fix_ip, text)
-	
+	if not text:
+		return text
+
+	if numba is not None:
+		# Jalur JIT: satu pass linear di atas byte teks, tanpa callback
+		# re.sub per kecocokan - menang jauh untuk output OCR panjang
+		raw = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+		out = np.empty_like(raw)
+		_fix_digit_confusions(raw, out)
+		text = out.tobytes().decode("utf-8")
+	else:
+		# Perbaiki IP address: ganti huruf O dengan 0 dalam deretan angka
+		def fix_ip(match):
+			return match.group(0).replace('O', '0').replace('o', '0')
+
+		text = re.sub(r'\b[\dOo]{1,3}\.[\dOo]{1,3}\.[\dOo]{1,3}\.[\dOo]{1,3}\b', fix_ip, text)
+
 	# Perbaiki nomor soal: "22." "23." dll - pastikan ada spasi setelahnya
 	text = re.sub(r'(\d+)\.\s*([A-Z])', r'\1. \2', text)
-	
+
 	return text
 
 
@@ -271,53 +535,107 @@ def draw_bounding_boxes(
 	img_for_detection: np.ndarray,
 	lang: str = "eng",
 	conf_threshold: float = 60.0,
+	api=None,
+	offset: Tuple[int, int] = (0, 0),
+	out: np.ndarray | None = None,
 ) -> Tuple[np.ndarray, int]:
 	"""
-	Menggunakan image_to_data untuk mendapatkan koordinat dan menggambar kotak di sekitar teks.
+	Mendapatkan koordinat kata lalu menggambar kotak di sekitar teks.
 	- img_for_detection sebaiknya hasil preprocessing (biner) agar deteksi lebih stabil.
 	- conf_threshold: ambang minimal confidence (0-100) agar kotak digambar.
+	- api: PyTessBaseAPI terbuka (opsional); jika ada, satu kali Recognize()
+	  dipakai untuk teks + confidence + box sekaligus, tanpa OCR pass kedua
+	  lewat subprocess image_to_data.
+	- offset: (x, y) jika img_for_detection adalah crop dari img_bgr
+	  (lihat crop_to_ink); koordinat kotak digeser balik sebesar ini.
+	- out: buffer anotasi (opsional). Caller yang tidak butuh img_bgr
+	  asli bisa melewatkan out=img_bgr agar tanpa salinan penuh.
 
 	Return: (gambar_beranotasi, jumlah_kotak)
 	"""
+	off_x, off_y = offset
+	annotated = out if out is not None else img_bgr.copy()
+
+	if api is not None:
+		count = 0
+		api.SetPageSegMode(PSM.SINGLE_BLOCK)
+		api.SetImage(Image.fromarray(img_for_detection))
+		api.Recognize()
+		ri = api.GetIterator()
+		if ri is not None:
+			for word in iterate_level(ri, RIL.WORD):
+				try:
+					text_i = (word.GetUTF8Text(RIL.WORD) or "").strip()
+					conf = float(word.Confidence(RIL.WORD))
+					x1, y1, x2, y2 = word.BoundingBox(RIL.WORD)
+				except Exception:
+					continue
+
+				if text_i != "" and conf >= conf_threshold:
+					x1, y1, x2, y2 = x1 + off_x, y1 + off_y, x2 + off_x, y2 + off_y
+					cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
+					cv2.putText(
+						annotated,
+						text_i[:25],
+						(x1, max(0, y1 - 5)),
+						cv2.FONT_HERSHEY_SIMPLEX,
+						0.5,
+						(0, 0, 255),
+						1,
+						cv2.LINE_AA,
+					)
+					count += 1
+
+		return annotated, count
+
 	config = "--oem 3 --psm 6"
 	data = pytesseract.image_to_data(
 		img_for_detection, lang=lang, config=config, output_type=Output.DICT
 	)
 
-	annotated = img_bgr.copy()
 	n = len(data["level"]) if "level" in data else 0
-	count = 0
+	if n == 0:
+		return annotated, 0
+
+	# Filter confidence + teks non-kosong secara vektor NumPy; loop Python
+	# hanya tersisa untuk kata yang lolos (pemanggilan cv2 draw).
+	# List default hanya dibangun bila key benar-benar tidak ada
+	# (argumen default .get dievaluasi duluan walau key-nya ada).
+	texts_raw = data["text"] if "text" in data else [""] * n
+	conf_raw = data["conf"] if "conf" in data else [-1] * n
+	texts = [(t or "").strip() for t in texts_raw]
+	try:
+		confs = np.asarray(conf_raw, dtype=np.float32)
+	except (TypeError, ValueError):
+		confs = np.array(
+			[float(c) if str(c).lstrip("-").replace(".", "", 1).isdigit() else -1.0 for c in conf_raw],
+			dtype=np.float32,
+		)
 
-	for i in range(n):
-		text_i = (data.get("text", [""] * n)[i] or "").strip()
-		conf_raw = data.get("conf", ["-1"] * n)[i]
-		try:
-			conf = float(conf_raw)
-		except Exception:
-			conf = -1.0
-
-		if text_i != "" and conf >= conf_threshold:
-			x = int(data.get("left", [0] * n)[i])
-			y = int(data.get("top", [0] * n)[i])
-			w = int(data.get("width", [0] * n)[i])
-			h = int(data.get("height", [0] * n)[i])
-
-			# Gambar kotak hijau di sekitar teks
-			cv2.rectangle(annotated, (x, y), (x + w, y + h), (0, 255, 0), 2)
-			# Teks kecil di atas kotak (opsional)
-			cv2.putText(
-				annotated,
-				text_i[:25],
-				(x, max(0, y - 5)),
-				cv2.FONT_HERSHEY_SIMPLEX,
-				0.5,
-				(0, 0, 255),
-				1,
-				cv2.LINE_AA,
-			)
-			count += 1
+	mask = (confs >= conf_threshold) & (np.asarray(texts, dtype=object) != "")
+	idx = np.nonzero(mask)[0]
+	xs = np.asarray(data["left"])[idx]
+	ys = np.asarray(data["top"])[idx]
+	ws = np.asarray(data["width"])[idx]
+	hs = np.asarray(data["height"])[idx]
+
+	for i, x, y, w, h in zip(idx, xs, ys, ws, hs):
+		x, y, w, h = int(x) + off_x, int(y) + off_y, int(w), int(h)
+		# Gambar kotak hijau di sekitar teks
+		cv2.rectangle(annotated, (x, y), (x + w, y + h), (0, 255, 0), 2)
+		# Teks kecil di atas kotak (opsional)
+		cv2.putText(
+			annotated,
+			texts[i][:25],
+			(x, max(0, y - 5)),
+			cv2.FONT_HERSHEY_SIMPLEX,
+			0.5,
+			(0, 0, 255),
+			1,
+			cv2.LINE_AA,
+		)
 
-	return annotated, count
+	return annotated, len(idx)
 
 
 def save_text(text: str, path: str = "hasil_teks.txt") -> None:
@@ -326,18 +644,22 @@ def save_text(text: str, path: str = "hasil_teks.txt") -> None:
 		f.write(text)
 
 
-def make_fallback_annotated(img_bgr: np.ndarray, message: str) -> np.ndarray:
+def make_fallback_annotated(
+	img_bgr: np.ndarray, message: str, out: np.ndarray | None = None
+) -> np.ndarray:
 	"""
 	Buat gambar anotasi sederhana yang menjelaskan mode fallback (tanpa Tesseract).
+	- out: buffer anotasi (opsional), sama seperti pada draw_bounding_boxes.
 	"""
-	annotated = img_bgr.copy()
+	annotated = out if out is not None else img_bgr.copy()
 	h, w = annotated.shape[:2]
 	banner_h = max(30, h // 18)
-	# Banner merah semi-transparan di atas
-	overlay = annotated.copy()
-	cv2.rectangle(overlay, (0, 0), (w, banner_h), (0, 0, 255), thickness=-1)
-	alpha = 0.5
-	annotated = cv2.addWeighted(overlay, alpha, annotated, 1 - alpha, 0)
+	# Banner merah semi-transparan: blending cukup pada strip atas saja,
+	# bukan salinan + addWeighted seukuran gambar penuh
+	banner = annotated[:banner_h]
+	overlay = np.empty_like(banner)
+	overlay[:] = (0, 0, 255)
+	cv2.addWeighted(overlay, 0.5, banner, 0.5, 0, dst=banner)
 	# Teks putih di banner
 	cv2.putText(
 		annotated,
@@ -369,8 +691,8 @@ def main() -> None:
 		print("Pastikan path benar dan file berada di folder kerja ini atau berikan path lengkap.")
 		sys.exit(1)
 
-	# Baca gambar
-	img = cv2.imread(img_path)
+	# Baca gambar (JPEG lewat libjpeg-turbo bila tersedia)
+	img = load_image(img_path)
 	if img is None:
 		print("[!] Gagal membaca gambar. Format mungkin tidak didukung atau file korup.")
 		sys.exit(1)
@@ -383,58 +705,70 @@ def main() -> None:
 		print("[!] Tidak menemukan tesseract.exe di lokasi umum.")
 		print("    Silakan install Tesseract OCR dan/atau set path manual di kode: pytesseract.pytesseract.tesseract_cmd")
 
+	# Buka satu API Tesseract untuk seluruh run (model LSTM dimuat sekali saja)
+	api = None
+	if TESSEROCR_AVAILABLE:
+		try:
+			api = PyTessBaseAPI(lang="eng+ind", psm=PSM.SINGLE_BLOCK, oem=OEM.LSTM_ONLY)
+		except Exception:
+			# Paket bahasa 'ind' mungkin tidak terpasang
+			try:
+				api = PyTessBaseAPI(lang="eng", psm=PSM.SINGLE_BLOCK, oem=OEM.LSTM_ONLY)
+			except Exception:
+				api = None
+	if api is not None:
+		print("[*] tesserocr tersedia: memakai satu API Tesseract untuk seluruh proses")
+
 	# === Enhanced preprocessing untuk akurasi maksimal ===
 	if use_enhanced:
 		print("[*] Mode: ENHANCED - Upscaling & multiple preprocessing")
-		
-		# Step 1: Upscale jika gambar kecil
-		h, w = img.shape[:2]
-		if w < 1500 or h < 1500:
-			scale = 2.0
-			print(f"[*] Upscaling gambar {scale}x untuk meningkatkan resolusi teks...")
-			img = upscale_image(img, scale)
-			print(f"    Ukuran baru: {img.shape[1]}x{img.shape[0]} pixels")
-		
-		# Step 2: Grayscale & enhancement
-		print("[*] Applying document enhancement (unsharp masking, contrast)...")
+
+		# Step 1: Grayscale dulu, baru upscale - resize satu kanal
+		# memindahkan 3x lebih sedikit byte daripada resize BGR penuh
 		if len(img.shape) == 3:
 			gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 		else:
 			gray = img.copy()
-		
+
+		# Step 2: Upscale jika gambar kecil
+		h, w = gray.shape[:2]
+		if w < 1500 or h < 1500:
+			scale = 2.0
+			print(f"[*] Upscaling gambar {scale}x untuk meningkatkan resolusi teks...")
+			gray = upscale_image(gray, scale)
+			# Kanvas anotasi harus seukuran citra yang di-OCR agar
+			# koordinat bounding box tetap cocok
+			img = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+			print(f"    Ukuran baru: {gray.shape[1]}x{gray.shape[0]} pixels")
+
+		# Step 3: Enhancement
+		print("[*] Applying document enhancement (unsharp masking, contrast)...")
 		enhanced_gray = enhance_document_image(gray)
 		
-		# Step 3: Multiple thresholding strategies
-		print("[*] Generating multiple preprocessing variants...")
-		
-		# Otsu threshold
-		_, otsu = cv2.threshold(enhanced_gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-		
-		# Adaptive threshold
-		adaptive = cv2.adaptiveThreshold(
-			enhanced_gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 15, 10
-		)
-		
-		# CLAHE + Otsu
-		clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-		clahe_img = clahe.apply(enhanced_gray)
-		_, clahe_otsu = cv2.threshold(clahe_img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-		
-		# Simpan untuk analisis
-		cv2.imwrite("debug_enhanced_gray.jpg", enhanced_gray)
-		cv2.imwrite("debug_otsu.jpg", otsu)
-		cv2.imwrite("debug_adaptive.jpg", adaptive)
-		cv2.imwrite("debug_clahe.jpg", clahe_otsu)
-		
-		processed_variants = [
-			("otsu", otsu),
-			("adaptive", adaptive),
-			("clahe", clahe_otsu),
-		]
+		# Step 4: Binerisasi adaptif Sauvola (satu pass, satu kali OCR)
+		print("[*] Applying Sauvola adaptive binarization...")
+		sauvola_bin = sauvola_threshold(enhanced_gray)
+
+		# Step 5: Crop ke area bertinta - margin kosong tidak perlu di-OCR
+		sauvola_bin, ink_x, ink_y = crop_to_ink(sauvola_bin)
+		crop_h, crop_w = sauvola_bin.shape[:2]
+		gray_roi = enhanced_gray[ink_y:ink_y + crop_h, ink_x:ink_x + crop_w]
+
+		# Simpan untuk analisis (async, kualitas 85 cukup untuk debug)
+		save_image_async("debug_enhanced_gray.jpg", enhanced_gray, quality=85)
+		save_image_async("debug_sauvola.jpg", sauvola_bin, quality=85)
+
+		# LSTM Tesseract melakukan thresholding internalnya sendiri dan
+		# umumnya lebih akurat diberi grayscale daripada citra biner;
+		# hasil Sauvola tetap dipakai untuk segmentasi bounding box
+		processed_variants = [("gray_enhanced", gray_roi)]
+		detection_img = sauvola_bin
 	else:
 		print("[*] Mode: STANDARD - Preprocessing cepat")
 		processed, gray = preprocess_image(img)
+		processed, ink_x, ink_y = crop_to_ink(processed)
 		processed_variants = [("standard", processed)]
+		detection_img = processed
 
 	# === OCR dengan multiple configs ===
 	print("[*] Melakukan OCR dengan multiple configurations...")
@@ -443,18 +777,21 @@ def main() -> None:
 	ocr_ok = True
 	all_texts = []
 	
+	def ocr_variant(variant: Tuple[str, np.ndarray]) -> str:
+		name, img_processed = variant
+		print(f"    - Processing variant: {name}")
+		# Coba dengan eng+ind (fallback ke eng jika ind tidak ada)
+		try:
+			return perform_ocr_optimized(img_processed, lang="eng+ind", api=api)
+		except pytesseract.TesseractNotFoundError:
+			raise
+		except Exception:
+			return perform_ocr_optimized(img_processed, lang="eng", api=api)
+
 	try:
-		for name, img_processed in processed_variants:
-			print(f"    - Processing variant: {name}")
-			# Coba dengan eng+ind (fallback ke eng jika ind tidak ada)
-			try:
-				text = perform_ocr_optimized(img_processed, lang="eng+ind")
-			except Exception:
-				text = perform_ocr_optimized(img_processed, lang="eng")
-			
-			if text:
-				all_texts.append(text)
-		
+		all_texts = [t for t in map(ocr_variant, processed_variants) if t]
+
+
 		# Pilih hasil terpanjang
 		if all_texts:
 			text = max(all_texts, key=len)
@@ -502,20 +839,23 @@ def main() -> None:
 	print("[*] Mendeteksi bounding boxes...")
 	try:
 		if ocr_ok and processed_variants:
-			# Gunakan variant terbaik untuk bounding box
-			_, best_processed = processed_variants[0]
-			annotated, n_boxes = draw_bounding_boxes(img, best_processed, lang="eng+ind", conf_threshold=30)
+			# Citra biner untuk segmentasi kotak kata
+			# img asli tidak dipakai lagi setelah ini -> anotasi in-place
+			annotated, n_boxes = draw_bounding_boxes(
+				img, detection_img, lang="eng+ind", conf_threshold=30, api=api,
+				offset=(ink_x, ink_y), out=img,
+			)
 			out_img_path = "hasil_deteksi.jpg"
-			cv2.imwrite(out_img_path, annotated)
+			save_image_async(out_img_path, annotated)
 			print(f"[+] Gambar hasil deteksi tersimpan ke: {out_img_path}")
 			print(f"[*] Total bounding boxes: {n_boxes}")
 		else:
 			# Mode fallback
 			annotated = make_fallback_annotated(
-				img, "Fallback: Tesseract tidak tersedia - OCR dilewati"
+				img, "Fallback: Tesseract tidak tersedia - OCR dilewati", out=img
 			)
 			out_img_path = "hasil_deteksi.jpg"
-			cv2.imwrite(out_img_path, annotated)
+			save_image_async(out_img_path, annotated)
 			print(f"[+] (Fallback) Gambar tersimpan ke: {out_img_path}")
 	except Exception as e:
 		print(f"[!] Gagal membuat/menyimpan gambar hasil deteksi: {e}")
@@ -535,38 +875,11 @@ def main() -> None:
 		print("  - debug_*.jpg         : Preprocessing variants untuk analisis")
 	print("="*70)
 
-	# Gambar bounding box dan simpan gambar hasil
-	try:
-		if ocr_ok:
-			annotated, n_boxes = draw_bounding_boxes(img, processed, lang="eng", conf_threshold=60)
-			out_img_path = "hasil_deteksi.jpg"
-			cv2.imwrite(out_img_path, annotated)
-			print(f"[+] Gambar hasil deteksi tersimpan ke: {out_img_path} (kotak: {n_boxes})")
-		else:
-			# Mode fallback: tidak ada bounding box, beri banner info
-			annotated = make_fallback_annotated(
-				img, "Fallback: Tesseract tidak tersedia - OCR dilewati"
-			)
-			out_img_path = "hasil_deteksi.jpg"
-			cv2.imwrite(out_img_path, annotated)
-			print(f"[+] (Fallback) Gambar tersimpan ke: {out_img_path}")
-	except Exception as e:
-		print(f"[!] Gagal membuat/menyimpan gambar hasil deteksi: {e}")
-		annotated = None
+	# Pastikan semua imwrite background selesai sebelum program keluar
+	_IO_POOL.shutdown(wait=True)
 
-	# Tampilkan gambar (opsional)
-	if use_enhanced:
-		print("\n[*] Debug images saved: debug_*.jpg")
-	
-	print("\n" + "="*70)
-	print("=== SELESAI ===")
-	print("="*70)
-	print("Output files:")
-	print("  - hasil_teks.txt      : Teks hasil OCR (sudah dikoreksi)")
-	print("  - hasil_deteksi.jpg   : Gambar dengan bounding boxes")
-	if use_enhanced:
-		print("  - debug_*.jpg         : Preprocessing variants untuk analisis")
-	print("="*70)
+	if api is not None:
+		api.End()
 
 
 if __name__ == "__main__":
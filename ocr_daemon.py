@@ -0,0 +1,108 @@
+"""
+Daemon OCR sederhana yang menjaga model Tesseract tetap "hangat".
+
+Setiap run main.py biasa membayar load model LSTM (~300-500 ms). Daemon
+ini memuat model sekali lalu melayani permintaan OCR lewat socket lokal,
+sehingga run-run berikutnya hanya membayar waktu OCR murni.
+
+Pemakaian:
+	python ocr_daemon.py        # biarkan berjalan di terminal terpisah
+
+main.py otomatis mencoba terhubung ke daemon ini lebih dulu; jika daemon
+tidak berjalan, OCR tetap berjalan in-process seperti biasa.
+
+Protokol (multiprocessing.connection, pickle):
+	kirim  : (img_ndarray, psm_int, lang_str)
+	terima : teks hasil OCR (str, sudah dibersihkan),
+	         atau None jika OCR di sisi daemon gagal (klien harus
+	         fallback ke OCR in-process)
+"""
+
+from __future__ import annotations
+
+import os
+
+# Sama seperti main.py: paksa tesseract single-thread (lihat catatan di sana)
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+from multiprocessing.connection import Listener
+
+import numpy as np
+import pytesseract
+
+try:
+	from PIL import Image
+	from tesserocr import OEM, PyTessBaseAPI
+
+	TESSEROCR_AVAILABLE = True
+except ImportError:
+	TESSEROCR_AVAILABLE = False
+
+# Alamat socket: Unix domain socket di POSIX, named pipe di Windows
+if os.name == "nt":
+	DAEMON_ADDRESS = r"\\.\pipe\ocr_daemon"
+	DAEMON_FAMILY = "AF_PIPE"
+else:
+	DAEMON_ADDRESS = "/tmp/ocr_daemon.sock"
+	DAEMON_FAMILY = "AF_UNIX"
+
+
+def _open_api():
+	"""Buka PyTessBaseAPI dengan fallback bahasa, atau None tanpa tesserocr."""
+	if not TESSEROCR_AVAILABLE:
+		return None
+	for lang in ("eng+ind", "eng"):
+		try:
+			return PyTessBaseAPI(lang=lang, oem=OEM.LSTM_ONLY)
+		except Exception:
+			continue
+	return None
+
+
+def _ocr(api, img: np.ndarray, psm: int, lang: str) -> str:
+	"""Satu permintaan OCR; pakai API hangat bila ada, selain itu pytesseract."""
+	if api is not None:
+		api.SetPageSegMode(psm)
+		api.SetImage(Image.fromarray(img))
+		return api.GetUTF8Text().replace("\x0c", "").strip()
+	config = f"--oem 3 --psm {psm}"
+	text = pytesseract.image_to_string(img, lang=lang, config=config)
+	return text.replace("\x0c", "").strip()
+
+
+def serve() -> None:
+	api = _open_api()
+	if api is not None:
+		print("[*] Model Tesseract dimuat (tesserocr, tetap hangat)")
+	else:
+		print("[*] tesserocr tidak tersedia: daemon memakai pytesseract per permintaan")
+
+	# Bersihkan sisa socket dari run sebelumnya
+	if os.name != "nt" and os.path.exists(DAEMON_ADDRESS):
+		os.unlink(DAEMON_ADDRESS)
+
+	with Listener(DAEMON_ADDRESS, DAEMON_FAMILY) as listener:
+		print(f"[*] OCR daemon siap di: {DAEMON_ADDRESS}")
+		print("    Tekan Ctrl+C untuk berhenti.")
+		while True:
+			conn = listener.accept()
+			try:
+				while True:
+					img, psm, lang = conn.recv()
+					try:
+						conn.send(_ocr(api, img, int(psm), lang))
+					except Exception as e:
+						# None = sinyal gagal; klien lanjut OCR in-process
+						print(f"[!] Permintaan OCR gagal: {e}")
+						conn.send(None)
+			except EOFError:
+				pass  # klien selesai; tunggu koneksi berikutnya
+			finally:
+				conn.close()
+
+
+if __name__ == "__main__":
+	try:
+		serve()
+	except KeyboardInterrupt:
+		print("\n[*] OCR daemon berhenti.")